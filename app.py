@@ -1,12 +1,11 @@
+import base64
+from functools import lru_cache
 import dash
-from dash import html, dcc, Input, Output
+from dash import html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
+from numba import njit
 from scipy.integrate import odeint
-from numpy import heaviside
-from textwrap import dedent
 import plotly.graph_objects as go
 
 
@@ -86,21 +85,21 @@ ajuste_condicoes_iniciais = html.Div(
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''$$S$$ total de suscetíveis''', mathjax=True), html_for="s_init"),
-                    dcc.Slider(id="s_init", min=0.1, max=5, value=2.5, tooltip={"placement": "bottom", "always_visible": False}),
+                    dcc.Slider(id="s_init", min=0.1, max=5, value=2.5, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}),
                 ],
                 className="m-2",
             ),
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''$$L$$ total de latentes ''', mathjax=True), html_for="i_init"),
-                    dcc.Slider(id="l_init", min=0, max=0.2, value=0.1, tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
+                    dcc.Slider(id="l_init", min=0, max=0.2, value=0.1, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
                 ],
                 className="m-1",
             ),
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''$$I$$ total de infectados ''', mathjax=True), html_for="r_init"),
-                    dcc.Slider(id="i_init", min=0.01, max=0.2, value=0.1, tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
+                    dcc.Slider(id="i_init", min=0.01, max=0.2, value=0.1, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
                 ],
                 className="m-1",
             ),
@@ -115,42 +114,42 @@ ajuste_parametros = html.Div(
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''Taxa de natalidade ($$a$$)''', mathjax=True), html_for="alpha"),
-                    dcc.Slider(id="a", min=0.5, max=3.0, value=1.0, tooltip={"placement": "bottom", "always_visible": False}),
+                    dcc.Slider(id="a", min=0.5, max=3.0, value=1.0, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}),
                 ],
                 className="m-2",
             ),
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''Taxa de contatos potencialmente infectantes ($$\\beta$$): ''', mathjax=True), html_for="beta"),
-                    dcc.Slider(id="beta", min=1, max=150, value=77, tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
+                    dcc.Slider(id="beta", min=1, max=150, value=77, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
                 ],
                 className="m-1",
             ),
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''Taxa de mortalidade natural ($$\\mu$$):''', mathjax=True), html_for="gamma"),
-                    dcc.Slider(id="mu", min=0.1, max=0.9, value=0.5, tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
+                    dcc.Slider(id="mu", min=0.1, max=0.9, value=0.5, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
                 ],
                 className="m-1",
             ),
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''Taxa de mortalidade pela doença ($$\\alpha$$):''', mathjax=True), html_for="delta"),
-                    dcc.Slider(id="alpha", min=1, max=150, value=73, tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
+                    dcc.Slider(id="alpha", min=1, max=150, value=73, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
                 ],
                 className="m-1",
             ),
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''Taxa relacionada à patogenicidade do agente ($$\\sigma$$):''', mathjax=True), html_for="nu"),
-                    dcc.Slider(id="sigma", min=1, max=25, value=13, tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
+                    dcc.Slider(id="sigma", min=1, max=25, value=13, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}, className="card-text"),
                 ],
                 className="m-1",
             ),
             html.Div(
                 [
                     dbc.Label(dcc.Markdown('''Capacidade suporte (K):''', mathjax=True), html_for="vacinacao"),
-                    dcc.Slider(id='K', min=0.1, max=10, value=2, tooltip={"placement": "bottom", "always_visible": False}, className="card-text" ),
+                    dcc.Slider(id='K', min=0.1, max=10, value=2, updatemode="mouseup", tooltip={"placement": "bottom", "always_visible": False}, className="card-text" ),
                 ],
                 className="m-1",
             ),
@@ -158,44 +157,152 @@ ajuste_parametros = html.Div(
         className="card border-dark mb-3",
     )
 
-def ode_sys(state, t, a, beta, mu, alpha, sigma, K):
-    s, l, i=state
+# o odeint chama o lado direito sempre como função Python (não aceita
+# LowLevelCallable); a versão compilada com numba é o caminho mais curto disponível.
+
+# as densidades são avaliadas como não negativas: perto de zero o integrador pode
+# levar I ou L a valores ligeiramente negativos, e o sistema original diverge daí.
+# Isso só é neutro com o atol quase nulo de _solve; com um atol folgado o vale de I
+# é achatado em zero e o corte atrasa a recuperação (extinção ou onda deslocada)
+@njit(cache=True)
+def ode_sys(t, state, a, beta, mu, alpha, sigma, K):
+    s, l, i=max(state[0], 0.), max(state[1], 0.), max(state[2], 0.)
     ds_dt=(a-mu)*s-((a-mu)/K)*s*(s+i+l)-beta*s*i
-    di_dt=beta*s*i-(sigma+mu+((a-mu)/K)*(s+l+i))*l
-    dl_dt=sigma*l-(alpha+mu+((a-mu)/K)*(s+l+i))*i
-    return [ds_dt, di_dt, dl_dt]
-
-@app.callback(Output('population_chart', 'figure'),
-              [Input('s_init', 'value'),
-              Input('l_init', 'value'),
-              Input('i_init', 'value'),
-              Input('a', 'value'),
-              Input('beta', 'value'),
-              Input('mu', 'value'),
-              Input('alpha', 'value'),
-              Input('sigma', 'value'),
-              Input('K', 'value')])
-def gera_grafico(s_init, i_init, l_init, a, beta, mu, alpha, sigma, K):
-    t_begin = 0.
-    t_end = 70.
-    t_nsamples = 10000
-    t_eval = np.linspace(t_begin, t_end, t_nsamples)
+    dl_dt=beta*s*i-(sigma+mu+((a-mu)/K)*(s+l+i))*l
+    di_dt=sigma*l-(alpha+mu+((a-mu)/K)*(s+l+i))*i
+    return ds_dt, dl_dt, di_dt
+
+@njit(cache=True)
+def ode_jac(t, state, a, beta, mu, alpha, sigma, K):
+    s, l, i=max(state[0], 0.), max(state[1], 0.), max(state[2], 0.)
+    r=(a-mu)/K
+    n=s+l+i
+    jac=np.empty((3, 3))
+    jac[0, 0]=(a-mu)-r*(2*s+l+i)-beta*i
+    jac[0, 1]=-r*s
+    jac[0, 2]=-r*s-beta*s
+    jac[1, 0]=beta*i-r*l
+    jac[1, 1]=-(sigma+mu+r*n)-r*l
+    jac[1, 2]=beta*s-r*l
+    jac[2, 0]=-r*i
+    jac[2, 1]=sigma-r*i
+    jac[2, 2]=-(alpha+mu+r*n)-r*i
+    for k in range(3):
+        if state[k]<0.:
+            jac[:, k]=0.
+    return jac
+
+@njit(cache=True)
+def lttb(x, y, n):
+    # índices de n pontos escolhidos pelo Largest-Triangle-Three-Buckets,
+    # que preserva picos e a forma da curva
+    m=len(x)
+    if n>=m or n<3:
+        return np.arange(m)
+    idx=np.empty(n, np.int64)
+    idx[0]=0
+    idx[n-1]=m-1
+    tamanho=(m-2)/(n-2)
+    a=0
+    for k in range(n-2):
+        ini=int(k*tamanho)+1
+        fim=int((k+1)*tamanho)+1
+        prox_fim=min(int((k+2)*tamanho)+1, m)
+        xm=x[fim:prox_fim].mean()
+        ym=y[fim:prox_fim].mean()
+        melhor=ini
+        maior_area=-1.
+        for j in range(ini, fim):
+            area=abs((x[a]-xm)*(y[j]-y[a])-(x[a]-x[j])*(ym-y[a]))
+            if area>maior_area:
+                maior_area=area
+                melhor=j
+        idx[k+1]=melhor
+        a=melhor
+    return idx
+
+# compila na importação para não penalizar o primeiro callback
+ode_sys(0., np.array([2.5, 0.1, 0.1]), 1., 77., 0.5, 73., 13., 2.)
+ode_jac(0., np.array([2.5, 0.1, 0.1]), 1., 77., 0.5, 73., 13., 2.)
+_y = np.zeros(10)
+_y.flags.writeable = False  # como as linhas devolvidas por _solve
+lttb(np.linspace(0., 1., 10), _y, 5)
+
+T_BEGIN = 0.
+T_END = 70.
+T_NSAMPLES = 700
+T_EVAL = np.linspace(T_BEGIN, T_END, T_NSAMPLES)
+N_PONTOS_GRAFICO = 300
+
+# estilo dos traços e layout; enviados uma única vez ao navegador, que recebe os pontos x, y a cada callback
+FIGURA_BASE = go.Figure()
+FIGURA_BASE.add_trace(go.Scatter(name='Suscetível',
+                                 line=dict(color='#00b400', width=4)))
+FIGURA_BASE.add_trace(go.Scatter(name ='Latente',
+                                 line=dict(color='#ff0000', width=4, dash='dot')))
+FIGURA_BASE.add_trace(go.Scatter(name='Infectado',
+                                 line=dict(color='#0000ff', width=4, dash='dashdot')))
+FIGURA_BASE.update_layout(title='Dinâmica Modelo SLI',
+                          xaxis_title='Tempo (anos)',
+                          yaxis_title='Indivíduos')
+
+@lru_cache(maxsize=256)
+def _solve(s_init, l_init, i_init, a, beta, mu, alpha, sigma, K):
+    # odeint limita o trabalho por intervalo de saída (mxstep), então nenhum
+    # conjunto de parâmetros prende o callback. atol praticamente nulo: nos vales
+    # I chega a ~5e-12 (padrão) e ~4e-20 (alpha=50), e qualquer atol acima disso
+    # achata o vale e desloca a onda epidêmica seguinte
     sol = odeint(func=ode_sys,
-                    y0=[s_init, i_init, l_init],
-                    t=t_eval,
-                    args=( a, beta, mu, alpha, sigma, K))
-    s,l,i = sol.T
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=t_eval, y=s, name='Suscetível',
-                             line=dict(color='#00b400', width=4)))
-    fig.add_trace(go.Scatter(x=t_eval, y=l, name ='Latente',
-                             line=dict(color='#ff0000', width=4, dash='dot')))
-    fig.add_trace(go.Scatter(x=t_eval, y=i, name='Infectado',
-                             line=dict(color='#0000ff', width=4, dash='dashdot')))
-    fig.update_layout(title='Dinâmica Modelo SLI',
-                       xaxis_title='Tempo (anos)',
-                       yaxis_title='Indivíduos')
-    return fig
+                 y0=[s_init, l_init, i_init],
+                 t=T_EVAL,
+                 args=( a, beta, mu, alpha, sigma, K),
+                 Dfun=ode_jac,
+                 tfirst=True,
+                 rtol=1e-4,
+                 atol=1e-30)
+    # cópia contígua: linhas de sol.T seriam não contíguas e o numba compilaria outra versão de lttb
+    y = np.ascontiguousarray(sol.T)
+    # o lru_cache devolve o mesmo array a todos os chamadores e threads
+    y.flags.writeable = False
+    return y
+
+def _typed_array(y):
+    # formato binário de arrays do plotly.js: float32 em base64, sem números em texto no JSON
+    return {'dtype': 'f4', 'bdata': base64.b64encode(y.astype('<f4').tobytes()).decode('ascii')}
+
+ENTRADAS = ['s_init', 'l_init', 'i_init', 'a', 'beta', 'mu', 'alpha', 'sigma', 'K']
+
+@app.callback(Output('solucao', 'data'),
+              [Input(nome, 'value') for nome in ENTRADAS])
+def gera_solucao(s_init, l_init, i_init, a, beta, mu, alpha, sigma, K):
+    # arredonda à resolução dos sliders para reaproveitar soluções já calculadas
+    # sempre float: um slider em valor inteiro faria o numba compilar outra versão de ode_sys
+    chave = tuple(round(float(x), 3) for x in (s_init, l_init, i_init, a, beta, mu, alpha, sigma, K))
+    s,l,i = _solve(*chave)
+    tracos = []
+    for y in (s, l, i):
+        idx = lttb(T_EVAL, y, N_PONTOS_GRAFICO)
+        tracos.append({'x': _typed_array(T_EVAL[idx]), 'y': _typed_array(y[idx])})
+    return tracos
+
+app.clientside_callback(
+    '''
+    function(solucao, figura) {
+        if (!solucao) {
+            return window.dash_clientside.no_update;
+        }
+        return {
+            data: figura.data.map(function(traco, k) {
+                return Object.assign({}, traco, solucao[k]);
+            }),
+            layout: figura.layout
+        };
+    }
+    ''',
+    Output('population_chart', 'figure'),
+    Input('solucao', 'data'),
+    State('figura_base', 'data'),
+)
 
 app.layout = dbc.Container([
                 cabecalho,
@@ -205,6 +312,8 @@ app.layout = dbc.Container([
                         dbc.Col(dcc.Graph(id='population_chart', className="shadow-sm rounded-3 border-primary",
                                 style={'height': '500px'}), width=6),
                 ]),
+                dcc.Store(id='solucao'),
+                dcc.Store(id='figura_base', data=FIGURA_BASE.to_plotly_json()),
               ], fluid=True),
 
 
@@ -0,0 +1,12 @@
+import os
+
+# gunicorn -c gunicorn_conf.py app:server
+# o app é importado (e o numba compilado) uma vez antes do fork dos workers
+preload_app = True
+# cada solução do modelo ocupa um núcleo inteiro (o GIL não é liberado), então um
+# worker por núcleo; as threads extras só atendem layout e arquivos estáticos
+# enquanto outra requisição integra. O lru_cache de _solve é por processo, de modo
+# que mais workers significam menos acertos no cache
+workers = os.cpu_count() or 1
+worker_class = 'gthread'
+threads = 2
@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+import pytest
+
+import app
+
+PADRAO = dict(s_init=2.5, l_init=0.1, i_init=0.1, a=1.0, beta=77.0, mu=0.5, alpha=73.0, sigma=13.0, K=2.0)
+
+VARREDURA = ([('alpha', float(v)) for v in range(1, 151)] +
+             [('beta', float(v)) for v in range(1, 151)] +
+             [('sigma', round(float(v), 1)) for v in np.arange(1, 25.01, 0.2)])
+
+# S, L, I em T_EVAL[INDICES] (t ≈ 5, 10, 15, 20, 30, 40 e 70 anos), integrados em
+# escala logarítmica com Radau (rtol=atol=1e-11)
+INDICES = [50, 100, 150, 200, 300, 400, 699]
+REFERENCIAS = {
+    'padrao': ({}, [[1.139142e+00, 5.948416e-01, 7.519876e-01, 8.645618e-01, 1.065146e+00, 1.015750e+00, 1.013667e+00],
+                    [3.739427e-11, 8.060039e-03, 3.928667e-02, 9.133968e-03, 2.182518e-02, 1.553762e-02, 1.770587e-02],
+                    [6.469654e-12, 1.526330e-03, 7.225326e-03, 1.649226e-03, 3.816065e-03, 2.737839e-03, 3.120741e-03]]),
+    'beta=60': ({'beta': 60.0}, [[1.497847e+00, 1.000120e+00, 1.151950e+00, 1.232438e+00, 1.304698e+00, 1.312419e+00, 1.309254e+00],
+                                 [1.152179e-07, 1.164640e-02, 2.166894e-02, 1.564459e-02, 1.440416e-02, 1.569739e-02, 1.590196e-02],
+                                 [1.984910e-08, 2.133170e-03, 3.890136e-03, 2.780677e-03, 2.537701e-03, 2.762890e-03, 2.799956e-03]]),
+    'sigma=3': ({'sigma': 3.0}, [[1.214207e+00, 1.294975e+00, 1.298775e+00, 1.160375e+00, 1.219991e+00, 1.223542e+00, 1.220802e+00],
+                                 [2.422036e-03, 1.254338e-01, 3.599061e-02, 6.050865e-02, 5.503748e-02, 5.738723e-02, 5.746871e-02],
+                                 [9.846776e-05, 5.081556e-03, 1.458117e-03, 2.465053e-03, 2.236770e-03, 2.331919e-03, 2.335488e-03]]),
+    'alpha=50': ({'alpha': 50.0}, [[4.979327e-01, 1.604191e+00, 7.260874e-01, 5.033105e-01, 6.642921e-01, 5.835415e-01, 7.138093e-01],
+                                   [7.380786e-19, 5.629181e-08, 9.925258e-09, 2.692035e-05, 6.024529e-04, 3.093429e-02, 1.740798e-02],
+                                   [2.022610e-19, 1.168697e-08, 2.522929e-09, 7.362786e-06, 1.560655e-04, 8.209618e-03, 4.436279e-03]]),
+}
+
+
+def _resolve(**alteracoes):
+    # mesma chave que gera_solucao monta a partir dos sliders, sem passar pelo cache
+    chave = tuple(round(float(x), 3) for x in dict(PADRAO, **alteracoes).values())
+    return app._solve.__wrapped__(*chave)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def aquece():
+    _resolve()
+
+
+@pytest.mark.parametrize('alteracoes, esperado', REFERENCIAS.values(), ids=REFERENCIAS.keys())
+def test_solucao_confere_com_referencia(alteracoes, esperado):
+    y = _resolve(**alteracoes)
+    np.testing.assert_allclose(y[:, INDICES], esperado, rtol=2e-2, atol=2e-3)
+
+
+@pytest.mark.parametrize('nome, valor', VARREDURA)
+def test_solucao_limitada(nome, valor):
+    inicio = time.perf_counter()
+    y = _resolve(**{nome: valor})
+    assert time.perf_counter() - inicio < 2.
+    assert y.shape == (3, app.T_NSAMPLES)
+    assert np.all(np.isfinite(y))
+    assert y.min() > -1e-6
+    assert y.max() < 10.